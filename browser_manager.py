@@ -1,74 +1,132 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
+import os
 import random
-from typing import Optional
+import time
+from typing import Dict, Iterator, List, Optional
 
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright_stealth.stealth import Stealth
 from config import ScraperConfig
 
+# Resolves once no DOM mutations happen for 100ms (capped at 800ms), then reports
+# [scrollY, scrollHeight, innerHeight] so lazy-loaded rows are counted without a fixed sleep.
+_SETTLE_AND_MEASURE_JS = """
+() => new Promise((resolve) => {
+    let quiet;
+    let cap;
+    let finished = false;
+    const done = () => {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearTimeout(quiet);
+        clearTimeout(cap);
+        resolve([window.scrollY, document.body.scrollHeight, window.innerHeight]);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quiet);
+        quiet = setTimeout(done, 100);
+    });
+    observer.observe(document.body, { childList: true, subtree: true });
+    quiet = setTimeout(done, 100);
+    cap = setTimeout(done, 800);
+})
+"""
 
 class BrowserManager:
     """Manage Playwright browser, context, and stealth/fingerprint settings."""
 
+    _STEALTH_JS = """
+        Object.defineProperty(Navigator.prototype, 'webdriver', {get: () => undefined});
+        window.chrome = window.chrome || { runtime: {} };
+        Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
+        Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
+    """
+    # Presence probe for optional elements; actions on them keep the default timeout
+    _FAST_FAIL_MS = 250
+
     def __init__(self, config: ScraperConfig) -> None:
         self.config = config
         self._playwright = None
+        # Per-instance RNG: reproducible with config.seed and independent of the global one
+        self._rng = random.Random(config.seed)
+        low, high = config.delay_range_seconds
+        self._delays = itertools.cycle([self._rng.uniform(low, high) for _ in range(1024)])
+        self._stealth: Optional[Stealth] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
+        self.contexts: List[BrowserContext] = []
+        self._context_cycle: Optional[Iterator[BrowserContext]] = None
+        self.restored_state = False
 
     async def __aenter__(self) -> "BrowserManager":
         self._playwright = await async_playwright().start()
+        self._stealth = Stealth()
         self.browser = await self._playwright.chromium.launch(headless=False)
-        ua = random.choice(self.config.user_agents)
-        proxy = (
-            {"server": random.choice(self.config.proxy_pool)}
-            if self.config.proxy_pool
-            else None
-        )
-        self.context = await self.browser.new_context(
-            user_agent=ua,
-            locale=self.config.locale,
-            timezone_id=self.config.timezone_id,
-            viewport={"width": self.config.viewport[0], "height": self.config.viewport[1]},
-            proxy=proxy,
-        )
+        storage_state = self._fresh_storage_state()
+        self.restored_state = storage_state is not None
+        # Playwright binds proxies per context, so rotation means one context per proxy
+        for server in self.config.proxy_pool or [None]:
+            self.contexts.append(
+                await self.browser.new_context(
+                    storage_state=storage_state,
+                    user_agent=self._rng.choice(self.config.user_agents),
+                    locale=self.config.locale,
+                    timezone_id=self.config.timezone_id,
+                    viewport={"width": self.config.viewport[0], "height": self.config.viewport[1]},
+                    proxy={"server": server} if server else None,
+                )
+            )
+        self.context = self.contexts[0]
+        self._context_cycle = itertools.cycle(self.contexts)
         return self
 
+    def _fresh_storage_state(self) -> Optional[str]:
+        """Returns the saved storage-state path if it is recent enough to reuse."""
+        path = self.config.storage_state_path
+        if not os.path.exists(path):
+            return None
+        if time.time() - os.path.getmtime(path) > self.config.storage_state_max_age_seconds:
+            return None
+        return path
+
     async def __aexit__(self, exc_type, exc, tb) -> None:
-        if self.context:
-            await self.context.close()
+        for context in self.contexts:
+            await context.close()
         if self.browser:
             await self.browser.close()
         if self._playwright:
             await self._playwright.stop()
 
     async def new_page(self) -> Page:
-        page = await self.context.new_page()
-        await Stealth().apply_stealth_async(page)
-        await page.add_init_script(
-            """
-            Object.defineProperty(Navigator.prototype, 'webdriver', {get: () => undefined});
-            window.chrome = window.chrome || { runtime: {} };
-            Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
-            Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
-            """
-        )
+        """Opens a stealth page, rotating round-robin across proxy contexts."""
+        page = await next(self._context_cycle).new_page()
+        await self._stealth.apply_stealth_async(page)
+        await page.add_init_script(self._STEALTH_JS)
         return page
 
+    async def sync_cookies(self) -> List[Dict]:
+        """Copies the primary context's cookies (e.g. delivery location) to every proxy context."""
+        cookies = await self.context.cookies()
+        for context in self.contexts[1:]:
+            await context.add_cookies(cookies)
+        return cookies
+
     async def human_delay(self) -> None:
-        low, high = self.config.delay_range_seconds
-        await asyncio.sleep(random.uniform(low, high))
+        await asyncio.sleep(next(self._delays))
 
     async def human_scroll(self, page: Page) -> None:
         """Deprecated: simple random scroll."""
-        for _ in range(random.randint(3, 6)):
-            await page.mouse.wheel(0, random.uniform(500, 1400))
+        for _ in range(self._rng.randint(3, 6)):
+            await page.mouse.wheel(0, self._rng.uniform(500, 1400))
             await self.human_delay()
 
     async def scroll_to_bottom(self, page: Page) -> None:
-        """Scrolls to bottom in steps of 1000px, waiting 1s between steps.
+        """Scrolls to bottom in steps of 1000px, waiting for the DOM to settle between steps.
         Resilient to navigation: avoids relying on evaluate() when page reloads.
         """
         last_y = -1
@@ -78,11 +136,9 @@ class BrowserManager:
                 await page.mouse.wheel(0, 1000)
             except Exception:
                 break
-            await asyncio.sleep(1)
             try:
-                y = await page.evaluate("window.scrollY")
-                h = await page.evaluate("document.body.scrollHeight")
-                ih = await page.evaluate("window.innerHeight")
+                # Settle wait and scroll metrics share a single round-trip
+                y, h, ih = await page.evaluate(_SETTLE_AND_MEASURE_JS)
                 if y == last_y:
                     stable_steps += 1
                 else:
@@ -102,50 +158,60 @@ class BrowserManager:
         print("Navigating to Amazon homepage to set delivery location...")
         await page.goto(self.config.base_url, wait_until="domcontentloaded")
         
-        # Click 'Deliver to' widget
+        # Click 'Deliver to' widget; a short attach probe replaces count() as the presence check
         deliver_to = page.locator("#nav-global-location-popover-link")
-        if await deliver_to.count() > 0:
-            print("Clicking 'Deliver to'...")
-            await deliver_to.click(force=True)
-            
-            # Wait for zip input
-            zip_input = page.locator("#GLUXZipUpdateInput")
-            try:
-                await zip_input.wait_for(state="visible", timeout=15000)
-            except Exception:
-                alt = page.locator("#GLUXZipUpdateInput")
-                await alt.wait_for(state="visible", timeout=10000)
-            
-            print(f"Entering zip code: {zip_code}...")
-            await zip_input.fill(zip_code)
-            
-            # Click Apply
-            apply_btn = page.locator("#GLUXZipUpdate input")  # or button
-            # Sometimes it's a span or input type=submit
-            if await apply_btn.count() == 0:
-                apply_btn = page.locator("span[data-action='GLUXZipUpdate']")
-            
-            await apply_btn.click()
-            await asyncio.sleep(1)
-            
-            # Confirm 'Done' or 'Continue' if a second popup appears
-            # Usually after zip update, there is a 'Continue' or 'Done' button to refresh
-            # Or the page reloads automatically.
-            # We look for "glowDoneButton" or similar.
-            done_btn = page.locator("button[name='glowDoneButton']")
-            if await done_btn.count() > 0:
-                print("Confirming location update...")
-                await done_btn.click()
-                # Wait for reload
-                await page.wait_for_load_state("domcontentloaded")
-            else:
-                # Sometimes it asks for confirmation in a different way or auto reloads
-                # We wait a bit to ensure it processes
-                await asyncio.sleep(2)
-                # Check if we need to reload manually to see effect? 
-                # Usually Amazon reloads itself.
-                pass
-            print("Delivery location set.")
-        else:
+        try:
+            await deliver_to.wait_for(state="attached", timeout=self._FAST_FAIL_MS)
+        except PlaywrightTimeoutError:
             print("Could not find 'Deliver to' widget. Skipping location set.")
+            return
+        print("Clicking 'Deliver to'...")
+        await deliver_to.click(force=True)
 
+        # Wait for zip input
+        zip_input = page.locator("#GLUXZipUpdateInput")
+        try:
+            await zip_input.wait_for(state="visible", timeout=15000)
+        except Exception:
+            alt = page.locator("#GLUXZipUpdateInput")
+            await alt.wait_for(state="visible", timeout=10000)
+
+        print(f"Entering zip code: {zip_code}...")
+        await zip_input.fill(zip_code)
+
+        # Click Apply
+        apply_btn = page.locator("#GLUXZipUpdate input")  # or button
+        # Sometimes it's a span or input type=submit
+        apply_btn = apply_btn.or_(page.locator("span[data-action='GLUXZipUpdate']"))
+        await apply_btn.first.click()
+        await asyncio.sleep(1)
+
+        # Confirm 'Done' or 'Continue' if a second popup appears
+        # Usually after zip update, there is a 'Continue' or 'Done' button to refresh
+        # Or the page reloads automatically.
+        # We look for "glowDoneButton" or similar.
+        done_btn = page.locator("button[name='glowDoneButton']")
+        try:
+            await done_btn.wait_for(state="attached", timeout=self._FAST_FAIL_MS)
+        except PlaywrightTimeoutError:
+            # Sometimes it asks for confirmation in a different way or auto reloads
+            # We wait a bit to ensure it processes
+            await asyncio.sleep(2)
+        else:
+            print("Confirming location update...")
+            # Present, so click with the normal timeout while the popover finishes animating
+            await done_btn.click()
+            # Wait for reload
+            await page.wait_for_load_state("domcontentloaded")
+
+        # Only persist a confirmed location; a saved state makes later runs skip this flow
+        try:
+            location = await page.locator("#glow-ingress-line2").text_content(timeout=5000)
+        except PlaywrightTimeoutError:
+            location = None
+        if location and zip_code in location:
+            print("Delivery location set.")
+            # Persist cookies so later runs can skip this navigation
+            await self.context.storage_state(path=self.config.storage_state_path)
+        else:
+            print("Could not confirm delivery location; not saving storage state.")
@@ -14,12 +14,26 @@ class ScraperConfig:
     base_url: str = "https://www.amazon.com"
     max_pages: int = 3
     max_retries: int = 3
+    # Shared budget for navigating to and scrolling one listing page
+    page_timeout_seconds: float = 90.0
+    # Added to items / requests_per_second to budget extraction of one page
+    extract_slack_seconds: float = 30.0
+    delivery_timeout_seconds: float = 60.0
     delay_range_seconds: Tuple[float, float] = (1.0, 3.0)
+    extract_concurrency: int = 5
+    requests_per_second: float = 1.0
+    http_connection_limit: int = 20
+    http_timeout_seconds: float = 30.0
+    detail_concurrency: int = 10
     output_csv: str = "amazon_electronics_ranking.csv"
+    debug_dump_html: bool = False
+    storage_state_path: str = "storage.json"
+    storage_state_max_age_seconds: float = 24 * 60 * 60
     locale: str = "en-US"
     timezone_id: str = "America/New_York"
     viewport: Tuple[int, int] = (1366, 768)
     proxy_pool: List[str] = field(default_factory=list)
+    seed: Optional[int] = None
     user_agents: List[str] = field(
         default_factory=lambda: [
             # Chrome
@@ -3,67 +3,65 @@ from __future__ import annotations
 import csv
 from datetime import datetime, timezone
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 
 class DataHandler:
     """Store, validate, and export product records to CSV with UTF-8 BOM."""
 
+    HEADERS = ("Name", "Price", "Rating", "Reviews", "URL", "Item_Type", "Timestamp")
+    # Record keys in the same order as HEADERS
+    FIELDS = ("name", "price", "rating", "reviews", "url", "item_type", "timestamp")
+
     def __init__(self) -> None:
         self.rows: List[Dict[str, Optional[str]]] = []
+        self._urls: Set[str] = set()
+        self._named_count = 0
+        self._current_ts: Optional[str] = None
 
     @staticmethod
     def _timestamp() -> str:
         return datetime.now(timezone.utc).isoformat()
 
+    def set_batch_timestamp(self) -> None:
+        """Stamps subsequent records with one capture time, e.g. once per page load."""
+        self._current_ts = self._timestamp()
+
     def validate_record(self, record: Dict) -> bool:
         required = ["name", "url"]
         return all(record.get(k) for k in required)
 
     def add_record(self, record: Dict) -> None:
-        record["timestamp"] = self._timestamp()
+        record["timestamp"] = self._current_ts or self._timestamp()
         self.rows.append(record)
+        if record.get("url"):
+            self._urls.add(record["url"])
+        if record.get("name"):
+            self._named_count += 1
+
+    def has_url(self, url: Optional[str]) -> bool:
+        return url in self._urls
+
+    @property
+    def named_count(self) -> int:
+        """Number of stored records with a name, maintained incrementally."""
+        return self._named_count
+
+    def _mapped_rows(self) -> List[Tuple]:
+        return [tuple(r.get(k) for k in self.FIELDS) for r in self.rows]
+
+    def _write(self, path: str, rows: List[Tuple]) -> None:
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.HEADERS)
+            writer.writerows(rows)
 
     def to_csv(self, file_path: str) -> None:
-        headers = ["Name", "Price", "Rating", "Reviews", "URL", "Item_Type", "Timestamp"]
-        target = file_path
+        rows = self._mapped_rows()
         try:
-            with open(target, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.DictWriter(
-                    f, fieldnames=headers, extrasaction="ignore"
-                )
-                writer.writeheader()
-                for r in self.rows:
-                    writer.writerow(
-                        {
-                            "Name": r.get("name"),
-                            "Price": r.get("price"),
-                            "Rating": r.get("rating"),
-                            "Reviews": r.get("reviews"),
-                            "URL": r.get("url"),
-                            "Item_Type": r.get("item_type"),
-                            "Timestamp": r.get("timestamp"),
-                        }
-                    )
+            self._write(file_path, rows)
         except PermissionError:
             base, ext = os.path.splitext(file_path)
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             fallback = f"{base}_{ts}{ext or '.csv'}"
-            with open(fallback, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.DictWriter(
-                    f, fieldnames=headers, extrasaction="ignore"
-                )
-                writer.writeheader()
-                for r in self.rows:
-                    writer.writerow(
-                        {
-                            "Name": r.get("name"),
-                            "Price": r.get("price"),
-                            "Rating": r.get("rating"),
-                            "Reviews": r.get("reviews"),
-                            "URL": r.get("url"),
-                            "Item_Type": r.get("item_type"),
-                            "Timestamp": r.get("timestamp"),
-                        }
-                    )
-
+            self._write(fallback, rows)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+from http_fetcher import HttpFetcher
+
+
+class Enricher:
+    """Fetch product detail pages concurrently with a bounded number in flight.
+
+    Extension point for detail-page enrichment: it reuses the HttpFetcher
+    session (pooled connections, per-request proxy rotation) and is not yet
+    called from scrape().
+    """
+
+    def __init__(self, fetcher: HttpFetcher) -> None:
+        self.fetcher = fetcher
+        self._sem = asyncio.Semaphore(fetcher.config.detail_concurrency)
+
+    async def fetch(self, url: str) -> Optional[str]:
+        async with self._sem:
+            return await self.fetcher.fetch(url)
+
+    async def fetch_all(self, urls: List[str]) -> List[Optional[str]]:
+        """Returns detail HTML in the same order as urls; failed fetches are None."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
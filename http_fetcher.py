@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Dict, List, Optional
+
+import aiohttp
+from yarl import URL
+
+from config import ScraperConfig
+
+
+class HttpFetcher:
+    """Fetch server-rendered listing HTML over a shared, pooled aiohttp session."""
+
+    def __init__(self, config: ScraperConfig) -> None:
+        self.config = config
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._rng = random.Random(config.seed)
+
+    async def __aenter__(self) -> "HttpFetcher":
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.config.http_connection_limit),
+            timeout=aiohttp.ClientTimeout(total=self.config.http_timeout_seconds),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self.session:
+            await self.session.close()
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "User-Agent": self._rng.choice(self.config.user_agents),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": f"{self.config.locale},en;q=0.9",
+        }
+
+    def _proxy(self) -> Optional[str]:
+        # Rotate per request; aiohttp accepts a proxy on each call
+        if not self.config.proxy_pool:
+            return None
+        return self._rng.choice(self.config.proxy_pool)
+
+    def use_cookies(self, cookies: List[Dict]) -> None:
+        """Shares browser cookies (e.g. the delivery location) with the static path."""
+        self.session.cookie_jar.update_cookies(
+            {c["name"]: c["value"] for c in cookies},
+            response_url=URL(self.config.base_url),
+        )
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Returns the page HTML, or None when the static request fails."""
+        try:
+            async with self.session.get(
+                url, headers=self._headers(), proxy=self._proxy()
+            ) as resp:
+                if resp.status != 200:
+                    print(f"Static fetch returned HTTP {resp.status} for {url}")
+                    return None
+                return await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Static fetch failed for {url}: {e}")
+            return None
@@ -15,27 +15,59 @@ Key features:
 """
 
 import asyncio
-from typing import List
+from typing import List, Tuple
 import os
 import re
 import time
 
-from playwright.async_api import Error
+from playwright.async_api import Error, Locator
 
 from browser_manager import BrowserManager
 from config import ScraperConfig
 from data_handler import DataHandler
 from exceptions import ElementNotFound
+from http_fetcher import HttpFetcher
 from parser import Parser
+from rate_limiter import AsyncRateLimiter
 
 
-async def dump_html(item, name: str) -> None:
-    html = await item.evaluate("el => el.outerHTML")
+async def dump_html(missing: List[Tuple[str, Locator]]) -> None:
+    """Writes the outerHTML of every (name, item) pair in one batch per page."""
+    htmls = await asyncio.gather(
+        *(item.evaluate("el => el.outerHTML") for _, item in missing),
+        return_exceptions=True,
+    )
     os.makedirs("debug_html", exist_ok=True)
-    safe = re.sub(r"[^a-zA-Z0-9_-]+", "_", name)[:50]
-    path = os.path.join("debug_html", f"{int(time.time())}_{safe}.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
+    ts = int(time.time())
+    for (name, _), html in zip(missing, htmls):
+        if isinstance(html, BaseException):
+            continue
+        safe = re.sub(r"[^a-zA-Z0-9_-]+", "_", name)[:50]
+        path = os.path.join("debug_html", f"{ts}_{safe}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+async def wait_for_growth(grid: Locator, current_count: int, deadline: float) -> int:
+    """Polls the grid (100ms backing off to 800ms) until it grows or the deadline passes."""
+    interval = 0.1
+    count = current_count
+    while time.monotonic() < deadline:
+        await asyncio.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        count = await grid.count()
+        if count > current_count:
+            break
+        interval = min(interval * 2, 0.8)
+    return count
+
+
+async def extract_one(
+    parser: Parser, item, limit: asyncio.Semaphore, limiter: AsyncRateLimiter
+) -> dict:
+    """Extracts a single grid item; concurrent tasks share one rate budget."""
+    async with limit:
+        async with limiter:
+            return await parser.extract(item)
 
 
 async def scrape() -> None:
@@ -43,16 +75,24 @@ async def scrape() -> None:
     handler = DataHandler()
     parser = Parser(base_url=config.base_url)
 
-    async with BrowserManager(config) as bm:
+    async with BrowserManager(config) as bm, HttpFetcher(config) as fetcher:
         page = await bm.new_page()
+        limit = asyncio.Semaphore(config.extract_concurrency)
+        limiter = AsyncRateLimiter(config.requests_per_second)
 
         # Set delivery location to NY to avoid geo-blocking
-        try:
-            await bm.set_delivery_location(page, "10001")
-        except Exception as e:
-            print(f"Warning: Failed to set delivery location: {e}")
+        if bm.restored_state:
+            print("Reusing saved delivery location from storage state.")
+        else:
+            try:
+                async with asyncio.timeout(config.delivery_timeout_seconds):
+                    await bm.set_delivery_location(page, "10001")
+            except Exception as e:
+                print(f"Warning: Failed to set delivery location: {e}")
+        fetcher.use_cookies(await bm.sync_cookies())
 
         # Start scraping
+        use_static = True
         for pg in range(1, config.max_pages + 1):
             if pg == 1:
                  # First page is the best sellers url
@@ -69,61 +109,120 @@ async def scrape() -> None:
             
             print(f"Scraping page {pg}: {url}")
             
-            ok = False
-            for attempt in range(1, config.max_retries + 1):
+            target_page_count = 50 if pg == 1 else min(50, 100 - handler.named_count)
+
+            pairs = None
+            # Adaptive path: listing HTML is mostly server-rendered, so try it without a browser first
+            if use_static:
+                html = await fetcher.fetch(url)
+                records = parser.extract_static(html) if html else []
+                # Only rows that will survive validation and dedup count toward the target
+                usable = [r for r in records if handler.validate_record(r) and not handler.has_url(r["url"])]
+                if len(usable) >= target_page_count:
+                    print(f"Parsed {len(usable)} usable items from static HTML.")
+                    pairs = [(None, record) for record in usable[:target_page_count]]
+                else:
+                    # Remember the miss so later pages skip straight to the browser
+                    use_static = False
+                    print("Static HTML fell short; using the browser for the rest of the run.")
+
+            if pairs is None:
+                if len(bm.contexts) > 1:
+                    # Open each listing page in the next proxy context so browser loads rotate IPs
+                    await page.close()
+                    page = await bm.new_page()
+
+                # Navigation and scrolling share one budget so a hung site cannot stall the run
+                deadline = asyncio.get_running_loop().time() + config.page_timeout_seconds
                 try:
-                    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                    ok = True
-                    break
-                except Error as e:
-                    print(f"Page load failed (attempt {attempt}): {e}")
-                    if attempt < config.max_retries:
-                         await bm.human_delay()
-            
-            if not ok:
-                print(f"Skipping page {pg} after retries.")
-                continue
-
-            target_page_count = 50 if pg == 1 else min(50, 100 - len([r for r in handler.rows if r.get("name")]))
-            items = []
-            for scroll_attempt in range(6):
-                await bm.scroll_to_bottom(page)
+                    async with asyncio.timeout_at(deadline):
+                        ok = False
+                        for attempt in range(1, config.max_retries + 1):
+                            try:
+                                await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                                ok = True
+                                break
+                            except Error as e:
+                                print(f"Page load failed (attempt {attempt}): {e}")
+                                if attempt < config.max_retries:
+                                     await bm.human_delay()
+                except TimeoutError:
+                    ok = False
+                    print(f"Page {pg} load exceeded {config.page_timeout_seconds}s budget.")
+
+                if not ok:
+                    print(f"Skipping page {pg} after retries.")
+                    continue
+
+                grid = page.locator("#gridItemRoot")
                 try:
-                    await page.wait_for_load_state("networkidle", timeout=5000)
+                    await grid.first.wait_for(state="attached", timeout=15000)
                 except Error:
-                    pass
-                items = await page.locator("#gridItemRoot").all()
-                if len(items) >= target_page_count:
+                    print(f"No grid items rendered on page {pg}.")
                     break
-                await page.evaluate("window.scrollBy(0, -500)")
-                await asyncio.sleep(2)
 
-            if not items:
-                break
-
-            seen_urls = {r.get("url") for r in handler.rows if r.get("url")}
-            for item in items[:target_page_count]:
-                await bm.human_delay()
+                # Scroll only until the target is present or lazy loading stops adding items;
+                # on budget expiry keep whatever has rendered so far
                 try:
-                    record = await parser.extract(item)
-                except ElementNotFound:
+                    async with asyncio.timeout_at(deadline):
+                        count = await grid.count()
+                        seen_counts = {count}
+                        unchanged = 0
+                        while count < target_page_count and unchanged < 2:
+                            await bm.scroll_to_bottom(page)
+                            count = await grid.count()
+                            if count < target_page_count:
+                                await page.evaluate("window.scrollBy(0, -500)")
+                                count = await wait_for_growth(grid, count, time.monotonic() + 2)
+                            # A count seen before (including a shrink back) is not progress
+                            unchanged = unchanged + 1 if count in seen_counts else 0
+                            seen_counts.add(count)
+                except TimeoutError:
+                    print(f"Page {pg} scrolling exceeded {config.page_timeout_seconds}s budget; using items rendered so far.")
+                items = await grid.all()
+
+                if not items:
+                    break
+
+                selected = items[:target_page_count]
+                tasks = [asyncio.ensure_future(extract_one(parser, item, limit, limiter)) for item in selected]
+                # The limiter spaces items 1/rate apart, so the budget scales with the item count;
+                # items finished before it runs out are kept
+                budget = len(selected) / config.requests_per_second + config.extract_slack_seconds
+                done, pending = await asyncio.wait(tasks, timeout=budget)
+                if pending:
+                    print(f"Extraction budget of {budget:.0f}s ran out; keeping {len(done)} of {len(tasks)} items.")
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                pairs = [
+                    (item, task.exception() or task.result())
+                    for item, task in zip(selected, tasks)
+                    if task in done
+                ]
+
+            handler.set_batch_timestamp()
+            missing = []
+            for item, record in pairs:
+                if isinstance(record, ElementNotFound):
                     continue
-                except Error as e:
-                    if "Target page, context or browser has been closed" in str(e):
+                if isinstance(record, Error):
+                    if "Target page, context or browser has been closed" in str(record):
                         print("Page closed during extraction, skipping remaining items on this page.")
                         break
-                    else:
-                        continue
+                    continue
+                if isinstance(record, BaseException):
+                    raise record
 
                 if handler.validate_record(record):
-                    if record.get("url") not in seen_urls:
+                    if not handler.has_url(record.get("url")):
                         handler.add_record(record)
-                        seen_urls.add(record.get("url"))
-                if record.get("price") is None and record.get("name"):
-                    await dump_html(item, record.get("name") or "item")
+                if config.debug_dump_html and item is not None and record.get("price") is None and record.get("name"):
+                    missing.append((record.get("name") or "item", item))
+            if missing:
+                await dump_html(missing)
 
-            total = len([r for r in handler.rows if r.get("name")])
-            if total >= 100:
+            if handler.named_count >= 100:
                 break
 
         handler.to_csv(config.output_csv)
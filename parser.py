@@ -1,16 +1,94 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
+from parsel import Selector
 from playwright.async_api import Locator
 
 from exceptions import ElementNotFound
 
+_RE_WS = re.compile(r"\s+")
+_RE_NUM = re.compile(r"([\d,.]+)")
+_RE_RATING = re.compile(r"([0-9]+(?:\.[0-9])?)\s*out of\s*5", re.I)
+_RE_FLOAT = re.compile(r"([0-9]+(?:\.[0-9])?)")
+_RE_INT = re.compile(r"([0-9,]+)")
+_RE_DOLLAR = re.compile(r"\$([0-9,.]+)")
+_RE_WHOLE = re.compile(r"[\d,]+")
+_RE_FRAC = re.compile(r"\d{1,2}")
+
+
+# Runs inside the page against a grid item; returns raw strings for Python-side parsing.
+_EXTRACT_JS = """
+(el, sels) => {
+    const first = (list, read) => {
+        for (const s of list) {
+            const n = el.querySelector(s);
+            if (!n) continue;
+            const v = read(n);
+            if (v && v.trim()) return v;
+        }
+        return null;
+    };
+    const text = (n) => n.textContent;
+    const price = el.querySelector('span.a-price');
+    const part = (s) => {
+        const n = price && price.querySelector(s);
+        return n ? n.textContent : null;
+    };
+    const innerText = el.innerText;
+    return {
+        href: first(sels.url, (n) => n.getAttribute('href')),
+        name: first(sels.name, text),
+        priceText: first(['span.aok-offscreen'], text),
+        wholeText: part('span.a-price-whole'),
+        fracText: part('span.a-price-fraction'),
+        text: innerText,
+        origText: first(sels.original_price, text),
+        ratingLabel: first(sels.rating, (n) => n.getAttribute('aria-label') || n.textContent),
+        reviewsText: first(sels.reviews, text),
+        sponsored: !!(el.querySelector('[aria-label="Sponsored"]') || /Sponsored/i.test(innerText)),
+    };
+}
+"""
+
 
 class Parser:
     """Extract product fields from a Best Sellers grid item."""
 
+    SELECTORS: Dict[str, List[str]] = {
+        "url": [
+            'a.a-link-normal.aok-block[href]',
+            'a.a-link-normal[href*="/dp/"]',
+            'a.a-link-normal[href*="/gp/"]',
+            'a[href^="/dp/"]',
+            'a[href^="/gp/"]',
+        ],
+        "name": [
+            'div._cDEzb_p13n-sc-css-line-clamp-3_g3dy1',
+            'a.a-link-normal[href] .p13n-sc-truncated',
+            'a.a-link-normal[href] span[aria-hidden="true"]',
+            '.a-size-medium.a-color-base.a-text-normal',
+            '.a-link-normal .a-size-base-plus',
+        ],
+        "original_price": [
+            'span.a-price.a-text-price span.a-offscreen',
+            'span.a-text-price span.a-offscreen',
+        ],
+        "rating": [
+            'a.a-link-normal[aria-label*="out of 5 stars"]',
+            'span[aria-label*="out of 5 stars"]',
+            'i.a-icon-star-small span.a-icon-alt',
+            'i.a-icon-star span.a-icon-alt',
+        ],
+        "reviews": [
+            'a[href*="#customerReviews"]',
+            'a.a-link-normal .a-size-small',
+            'span[aria-label$="ratings"]',
+            'span.a-size-base.s-underline-text',
+        ],
+    }
+
     def __init__(self, base_url: str) -> None:
         self.base_url = base_url.rstrip("/")
 
@@ -18,14 +96,14 @@ class Parser:
     def _normalize_text(raw: Optional[str]) -> str:
         if not raw:
             return ""
-        return re.sub(r"\s+", " ", raw).strip()
+        return _RE_WS.sub(" ", raw).strip()
 
     @staticmethod
     def _parse_price(raw: Optional[str]) -> Optional[float]:
         if not raw:
             return None
         cleaned = raw.replace("\u00a0", " ")
-        m = re.search(r"([\d,.]+)", cleaned)
+        m = _RE_NUM.search(cleaned)
         if not m:
             return None
         num = m.group(1).replace(",", "")
@@ -38,10 +116,10 @@ class Parser:
     def _parse_rating(raw: Optional[str]) -> Optional[float]:
         if not raw:
             return None
-        m = re.search(r"([0-9]+(?:\.[0-9])?)\s*out of\s*5", raw, flags=re.I)
+        m = _RE_RATING.search(raw)
         if not m:
             # Fallback: extract first float
-            m2 = re.search(r"([0-9]+(?:\.[0-9])?)", raw)
+            m2 = _RE_FLOAT.search(raw)
             if not m2:
                 return None
             try:
@@ -57,7 +135,7 @@ class Parser:
     def _parse_reviews(raw: Optional[str]) -> Optional[int]:
         if not raw:
             return None
-        m = re.search(r"([0-9,]+)", raw)
+        m = _RE_INT.search(raw)
         if not m:
             return None
         try:
@@ -66,90 +144,71 @@ class Parser:
             return None
 
     async def extract(self, item: Locator) -> Dict[str, Optional[str]]:
+        # One CDP round-trip: all selector fallbacks run in-page
+        raw = await item.evaluate(_EXTRACT_JS, self.SELECTORS)
+        return self._build_record(raw)
+
+    def extract_static(self, html: str) -> List[Dict[str, Optional[str]]]:
+        """Parses every grid item from server-rendered listing HTML."""
+        records = []
+        for item in Selector(text=html).css("#gridItemRoot"):
+            try:
+                records.append(self._build_record(self._snapshot_static(item)))
+            except ElementNotFound:
+                continue
+        return records
+
+    def _snapshot_static(self, item: Selector) -> Dict[str, Optional[str]]:
+        """Mirrors _EXTRACT_JS for a parsel node so both paths share parsing."""
+
+        def first(selectors: List[str], read) -> Optional[str]:
+            for selector in selectors:
+                nodes = item.css(selector)
+                if not nodes:
+                    continue
+                value = read(nodes[0])
+                if value and value.strip():
+                    return value
+            return None
+
+        def text(node: Selector) -> Optional[str]:
+            return node.xpath("string()").get()
+
+        def part(selector: str) -> Optional[str]:
+            nodes = price[0].css(selector) if price else []
+            return text(nodes[0]) if nodes else None
+
+        price = item.css("span.a-price")
+        full_text = text(item) or ""
+        return {
+            "href": first(self.SELECTORS["url"], lambda n: n.attrib.get("href")),
+            "name": first(self.SELECTORS["name"], text),
+            "priceText": first(["span.aok-offscreen"], text),
+            "wholeText": part("span.a-price-whole"),
+            "fracText": part("span.a-price-fraction"),
+            "text": full_text,
+            "origText": first(self.SELECTORS["original_price"], text),
+            "ratingLabel": first(
+                self.SELECTORS["rating"], lambda n: n.attrib.get("aria-label") or text(n)
+            ),
+            "reviewsText": first(self.SELECTORS["reviews"], text),
+            "sponsored": bool(item.css('[aria-label="Sponsored"]')) or "sponsored" in full_text.lower(),
+        }
+
+    def _build_record(self, raw: Dict) -> Dict[str, Optional[str]]:
         # Product URL
-        url = None
-        for selector in [
-            'a.a-link-normal.aok-block[href]',
-            'a.a-link-normal[href*="/dp/"]',
-            'a.a-link-normal[href*="/gp/"]',
-            'a[href^="/dp/"]',
-            'a[href^="/gp/"]',
-        ]:
-            locator = item.locator(selector).first
-            if await locator.count() > 0:
-                href = await locator.get_attribute("href")
-                if href:
-                    if href.startswith("http"):
-                        url = href
-                    else:
-                        url = f"{self.base_url}{href}"
-                    break
-        if not url:
+        href = raw.get("href")
+        if not href:
             raise ElementNotFound("Product URL not found")
+        url = href if href.startswith("http") else f"{self.base_url}{href}"
 
-        # Product Name
-        name = ""
-        for selector in [
-            'div._cDEzb_p13n-sc-css-line-clamp-3_g3dy1',
-            'a.a-link-normal[href] .p13n-sc-truncated',
-            'a.a-link-normal[href] span[aria-hidden="true"]',
-            '.a-size-medium.a-color-base.a-text-normal',
-            '.a-link-normal .a-size-base-plus',
-        ]:
-            locator = item.locator(selector).first
-            if await locator.count() > 0:
-                name = self._normalize_text(await locator.text_content())
-                if name:
-                    break
-
-        price = await self.get_price(item)
-
-        # Original price (if present)
-        orig_raw = None
-        for selector in [
-            'span.a-price.a-text-price span.a-offscreen',
-            'span.a-text-price span.a-offscreen',
-        ]:
-            locator = item.locator(selector).first
-            if await locator.count() > 0:
-                orig_raw = await locator.text_content()
-                if orig_raw:
-                    break
-        original_price = self._parse_price(self._normalize_text(orig_raw))
-
-        # Rating
-        rating_raw = None
-        for selector in [
-            'a.a-link-normal[aria-label*="out of 5 stars"]',
-            'span[aria-label*="out of 5 stars"]',
-            'i.a-icon-star-small span.a-icon-alt',
-            'i.a-icon-star span.a-icon-alt',
-        ]:
-            locator = item.locator(selector).first
-            if await locator.count() > 0:
-                rating_raw = await locator.get_attribute("aria-label")
-                if not rating_raw:
-                    rating_raw = await locator.text_content()
-                if rating_raw:
-                    break
-        rating = self._parse_rating(self._normalize_text(rating_raw))
-
-        # Review count
-        reviews_raw = None
-        for selector in [
-            'a[href*="#customerReviews"]',
-            'a.a-link-normal .a-size-small',
-            'span[aria-label$="ratings"]',
-            'span.a-size-base.s-underline-text',
-        ]:
-            locator = item.locator(selector).first
-            if await locator.count() > 0:
-                reviews_raw = await locator.text_content()
-                if reviews_raw:
-                    break
-        reviews = self._parse_reviews(self._normalize_text(reviews_raw))
-
-        item_type = "Sponsored" if await self.is_sponsored(item) else "Organic"
+        name = self._normalize_text(raw.get("name"))
+        price = self.get_price(raw)
+        original_price = self._parse_price(self._normalize_text(raw.get("origText")))
+        rating = self._parse_rating(self._normalize_text(raw.get("ratingLabel")))
+        reviews = self._parse_reviews(self._normalize_text(raw.get("reviewsText")))
+
+        item_type = "Sponsored" if raw.get("sponsored") else "Organic"
         return {
             "name": name or None,
             "price": price,
@@ -160,52 +219,36 @@ class Parser:
             "item_type": item_type,
         }
 
-    async def get_price(self, item: Locator) -> Optional[float]:
-        a = item.locator('span.aok-offscreen').first
-        if await a.count() > 0:
-            raw = await a.text_content()
-            v = self._parse_price(self._normalize_text(raw))
-            if v is not None:
-                return v
-        c = item.locator('span.a-price').first
-        if await c.count() > 0:
-            whole_loc = c.locator('span.a-price-whole').first
-            frac_loc = c.locator('span.a-price-fraction').first
-            whole = await whole_loc.text_content() if await whole_loc.count() > 0 else None
-            frac = await frac_loc.text_content() if await frac_loc.count() > 0 else None
-            if whole or frac:
-                w = None
-                f = None
-                if whole:
-                    m1 = re.search(r"[\d,]+", whole)
-                    if m1:
-                        w = m1.group(0).replace(',', '')
-                if frac:
-                    m2 = re.search(r"\d{1,2}", frac)
-                    if m2:
-                        f = m2.group(0)
-                if w and f:
-                    try:
-                        return float(f"{w}.{f}")
-                    except ValueError:
-                        pass
-                if w and not f:
-                    try:
-                        return float(w)
-                    except ValueError:
-                        pass
-        text = await item.inner_text()
-        text = self._normalize_text(text)
+    def get_price(self, raw: Dict[str, Optional[str]]) -> Optional[float]:
+        v = self._parse_price(self._normalize_text(raw.get("priceText")))
+        if v is not None:
+            return v
+        whole = raw.get("wholeText")
+        frac = raw.get("fracText")
+        if whole or frac:
+            w = None
+            f = None
+            if whole:
+                m1 = _RE_WHOLE.search(whole)
+                if m1:
+                    w = m1.group(0).replace(',', '')
+            if frac:
+                m2 = _RE_FRAC.search(frac)
+                if m2:
+                    f = m2.group(0)
+            if w and f:
+                try:
+                    return float(f"{w}.{f}")
+                except ValueError:
+                    pass
+            if w and not f:
+                try:
+                    return float(w)
+                except ValueError:
+                    pass
+        text = self._normalize_text(raw.get("text"))
         # Fallback: look for $ pattern to avoid picking up rank numbers (e.g. "1", "2")
-        m = re.search(r"\$([0-9,.]+)", text)
+        m = _RE_DOLLAR.search(text)
         if m:
             return self._parse_price(m.group(1))
         return None
-
-    async def is_sponsored(self, item: Locator) -> bool:
-        l1 = item.get_by_text("Sponsored", exact=False)
-        if await l1.count() > 0:
-            return True
-        l2 = item.locator('[aria-label="Sponsored"]')
-        return await l2.count() > 0
-
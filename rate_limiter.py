@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import asyncio
+
+
+class AsyncRateLimiter:
+    """Space entries at least 1/rate seconds apart across all concurrent tasks."""
+
+    def __init__(self, rate: float = 1.0) -> None:
+        self.interval = 1.0 / rate
+        self._lock = asyncio.Lock()
+        self._next_time = 0.0
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        # Only the wait is serialized; the guarded body runs concurrently
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait = self._next_time - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_time = max(now, self._next_time) + self.interval
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None